@@ -3,45 +3,57 @@
 # Usage: ./{function_name}.py <tool-data>
 
 import os
-import re
-import json
 import sys
-import importlib.util
-from pathlib import Path
 
 def _ensure_cwd_venv():
-    cwd = Path.cwd()
-    venv_dir = cwd / ".venv"
-    if not venv_dir.is_dir():
+    cwd = os.getcwd()
+    # Set just before the re-exec below so the re-exec'd process skips the
+    # filesystem checks; popped so it doesn't leak into processes the tool starts
+    if os.environ.pop("LLM_VENV_OK", None) == cwd:
         return
 
-    py = venv_dir / ("Scripts/python.exe" if os.name == "nt" else "bin/python")
-    if not py.exists():
+    venv_dir = os.path.join(cwd, ".venv")
+    if not os.path.isdir(venv_dir):
         return
 
-    if Path(sys.prefix).resolve() == venv_dir.resolve():
+    if os.name == "nt":
+        py = os.path.join(venv_dir, "Scripts", "python.exe")
+    else:
+        py = os.path.join(venv_dir, "bin", "python")
+    if not os.path.exists(py):
+        return
+
+    if os.path.realpath(sys.prefix) == os.path.realpath(venv_dir):
         return
 
-    os.execv(str(py), [str(py)] + sys.argv)
+    os.environ["LLM_VENV_OK"] = cwd
+    os.execv(py, [py] + sys.argv)
 
 _ensure_cwd_venv()
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def main():
     raw_data = parse_argv()
     tool_data = parse_raw_data(raw_data)
 
-    root_dir = "{root_dir}"
-    setup_env(root_dir)
+    setup_env()
 
     tool_path = "{tool_path}.py"
-    run(tool_path, "run", tool_data)
+    if not run_in_daemon(tool_path, "run", tool_data):
+        run(tool_path, "run", tool_data)
 
 
 def parse_raw_data(data):
     if not data:
         raise ValueError("No JSON data")
 
+    import json
+
     try:
         return json.loads(data)
     except Exception:
@@ -60,40 +72,37 @@ def parse_argv():
     return tool_data
 
 
-def setup_env(root_dir):
-    load_env(os.path.join(root_dir, ".env"))
-    os.environ["LLM_ROOT_DIR"] = root_dir
+def setup_env():
+    load_env("{root_dir}/.env")
+    os.environ["LLM_ROOT_DIR"] = "{root_dir}"
     os.environ["LLM_TOOL_NAME"] = "{function_name}"
-    os.environ["LLM_TOOL_CACHE_DIR"] = os.path.join(root_dir, "cache", "{function_name}")
+    os.environ["LLM_TOOL_CACHE_DIR"] = "{root_dir}/cache/{function_name}"
 
 
 def load_env(file_path):
     try:
-        with open(file_path, "r") as f:
-            lines = f.readlines()
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = f.read()
     except:
         return
 
-    env_vars = {}
-
-    for line in lines:
-        line = line.strip()
-        if line.startswith("#") or not line:
-            continue
-
-        key, *value_parts = line.split("=")
-        env_name = key.strip()
+    import re
 
-        if env_name not in os.environ:
-            env_value = "=".join(value_parts).strip()
-            if (env_value.startswith('"') and env_value.endswith('"')) or (env_value.startswith("'") and env_value.endswith("'")):
-                env_value = env_value[1:-1]
-            env_vars[env_name] = env_value
+    # KEY=value, with the value optionally wrapped in matching quotes. Like a split on the
+    # first "=", the key is anything before it, and a line without one sets an empty value
+    env_re = re.compile(r"""^[ \t]*([^\s#=][^=\n]*?)[ \t]*(?:=[ \t]*(["']?)(.*?)\2)?[ \t]*$""", re.MULTILINE)
+    env_vars = {
+        m.group(1): m.group(3) or ""
+        for m in env_re.finditer(data)
+        if m.group(1) not in os.environ
+    }
 
     os.environ.update(env_vars)
 
 
 def run(tool_path, tool_func, tool_data):
+    import importlib.util
+
     spec = importlib.util.spec_from_file_location(
         os.path.basename(tool_path), tool_path
     )
@@ -108,28 +117,118 @@ def run(tool_path, tool_func, tool_data):
     dump_result("{function_name}")
 
 
+def run_in_daemon(tool_path, tool_func, tool_data):
+    if os.environ.get("LLM_AGENT_DAEMON_SOCKET"):
+        sock_path = os.environ["LLM_AGENT_DAEMON_SOCKET"]
+    elif os.environ.get("XDG_RUNTIME_DIR"):
+        sock_path = os.path.join(os.environ["XDG_RUNTIME_DIR"], "loki", "agent.sock")
+    else:
+        return False
+
+    if not os.path.exists(sock_path):
+        return False
+
+    import json
+    import socket
+
+    if not hasattr(socket, "AF_UNIX") or not hasattr(socket, "send_fds"):
+        return False
+
+    request = {
+        "path": tool_path,
+        "func": tool_func,
+        "data": tool_data,
+        "env": dict(os.environ),
+        "cwd": os.getcwd(),
+        "prefix": sys.prefix,
+    }
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        # Until the daemon accepts the call, give up and run in-process if it's unresponsive
+        sock.settimeout(5)
+        try:
+            sock.connect(sock_path)
+            socket.send_fds(sock, [json.dumps(request).encode("utf-8")], [0, 1, 2])
+            sock.shutdown(socket.SHUT_WR)
+            reply = b""
+            while b"\n" not in reply:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    return False
+                reply += chunk
+
+            status, _, reply = reply.partition(b"\n")
+            if json.loads(status).get("fallback"):
+                return False
+        except (OSError, ValueError):
+            return False
+
+        sock.settimeout(None)
+        try:
+            while chunk := sock.recv(65536):
+                reply += chunk
+            response = json.loads(reply)
+        except (OSError, ValueError):
+            sys.exit(f"Agent daemon at '{sock_path}' closed the connection before replying")
+
+    if "exit" in response:
+        sys.exit(response["exit"])
+
+    if response["output"] is not None:
+        write_output(response["output"].encode("utf-8"))
+    dump_result("{function_name}")
+    return True
+
+
 def return_to_llm(value):
     if value is None:
         return
 
+    if isinstance(value, (str, int, float, bool)):
+        data = str(value).encode("utf-8")
+    elif isinstance(value, (dict, list)):
+        data = None
+        if orjson:
+            # orjson rejects some values json accepts (e.g. ints wider than 64 bits)
+            try:
+                data = orjson.dumps(value, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                pass
+        if data is None:
+            import json
+
+            data = json.dumps(value, indent=2, ensure_ascii=False).encode("utf-8")
+    else:
+        data = b""
+
+    write_output(data)
+
+
+def write_output(data):
     if "LLM_OUTPUT" in os.environ:
-        writer = open(os.environ["LLM_OUTPUT"], "w")
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+        fd = os.open(os.environ["LLM_OUTPUT"], flags, 0o644)
+        try:
+            write_fd(fd, data)
+        finally:
+            os.close(fd)
     else:
-        writer = sys.stdout
+        sys.stdout.flush()
+        write_fd(sys.stdout.fileno(), data)
 
-    value_type = type(value).__name__
-    if value_type in ("str", "int", "float", "bool"):
-        writer.write(str(value))
-    elif value_type == "dict" or value_type == "list":
-        value_str = json.dumps(value, indent=2)
-        assert value == json.loads(value_str)
-        writer.write(value_str)
+
+def write_fd(fd, data):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
 
 
 def dump_result(name):
     if (not os.getenv("LLM_DUMP_RESULTS")) or (not os.getenv("LLM_OUTPUT")) or (not os.isatty(1)):
         return
 
+    import re
+
     show_result = False
     try:
         if re.search(rf'\b({os.environ["LLM_DUMP_RESULTS"]})\b', name):
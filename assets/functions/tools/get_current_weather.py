@@ -1,8 +1,42 @@
 import os
+import sys
+from http.client import HTTPException, HTTPSConnection, RemoteDisconnected
 from pathlib import Path
 from typing import Optional
+from urllib.error import HTTPError
 from urllib.parse import quote_plus
-from urllib.request import urlopen
+
+_CONN = None
+# The User-Agent urlopen sends, which wttr.in answers with plain text
+_USER_AGENT = f"Python-urllib/{sys.version_info[0]}.{sys.version_info[1]}"
+
+
+def _fetch(path: str) -> bytes:
+    """Fetch a path from wttr.in, reusing one keep-alive connection per process"""
+    global _CONN
+    reused = _CONN is not None
+    if _CONN is None:
+        _CONN = HTTPSConnection("wttr.in", timeout=10)
+    try:
+        _CONN.request("GET", path, headers={"User-Agent": _USER_AGENT})
+        resp = _CONN.getresponse()
+        body = resp.read()
+    except (RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+        _CONN.close()
+        _CONN = None
+        if not reused:
+            raise
+        # The server dropped the idle connection; retry once on a fresh one
+        return _fetch(path)
+    except (HTTPException, OSError):
+        _CONN.close()
+        _CONN = None
+        raise
+
+    # Redirects aren't followed, so anything but a 2xx response is an error
+    if not 200 <= resp.status < 300:
+        raise HTTPError(f"https://wttr.in{path}", resp.status, resp.reason, resp.headers, None)
+    return body
 
 
 def run(
@@ -17,10 +51,7 @@ def run(
     Returns:
         str: A single-line formatted weather string from wttr.in (``format=4`` with metric units).
     """
-    url = f"https://wttr.in/{quote_plus(location)}?format=4&M"
-
-    with urlopen(url, timeout=10) as resp:
-        weather = resp.read().decode("utf-8", errors="replace")
+    weather = _fetch(f"/{quote_plus(location)}?format=4&M").decode("utf-8", errors="replace")
 
     dest = llm_output if llm_output is not None else os.environ.get("LLM_OUTPUT", "/dev/stdout")
 
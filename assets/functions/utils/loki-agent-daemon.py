@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+
+# Usage: ./loki-agent-daemon.py [socket-path]
+#
+# Opt-in resident host for Python tools and agent functions. While this daemon is
+# listening, the generated run-tool/run-agent scripts hand their call to it instead of
+# importing and executing the tool module themselves, so the module stays loaded between
+# calls. Each call runs in a child forked from the daemon, attached to the caller's
+# stdin/stdout/stderr. When the socket doesn't exist, the scripts run the call in-process
+# as usual.
+#
+# The socket defaults to $LLM_AGENT_DAEMON_SOCKET, or $XDG_RUNTIME_DIR/loki/agent.sock.
+
+import contextlib
+import importlib.util
+import json
+import os
+import signal
+import socket
+import sys
+import traceback
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MAX_CACHED_MODULES = 32
+MAX_REQUEST_SIZE = 16 * 1024 * 1024
+REQUEST_TIMEOUT = 5
+
+
+def main():
+    sock_path = sys.argv[1] if len(sys.argv) > 1 else daemon_socket_path()
+    if not sock_path:
+        print("Usage: ./loki-agent-daemon.py [socket-path]", file=sys.stderr)
+        print("Set LLM_AGENT_DAEMON_SOCKET or XDG_RUNTIME_DIR, or pass the socket path", file=sys.stderr)
+        sys.exit(1)
+
+    os.makedirs(os.path.dirname(sock_path), mode=0o700, exist_ok=True)
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(sock_path)
+
+    # Exit through the cleanup below instead of leaving a stale socket behind
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    # Finished children are reaped automatically
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    modules = OrderedDict()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(sock_path)
+        os.chmod(sock_path, 0o600)
+        server.listen()
+        print(f"Listening on {sock_path}", file=sys.stderr)
+
+        try:
+            while True:
+                conn, _ = server.accept()
+                with conn:
+                    serve(server, conn, modules)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(sock_path)
+
+
+def daemon_socket_path():
+    if os.environ.get("LLM_AGENT_DAEMON_SOCKET"):
+        return os.environ["LLM_AGENT_DAEMON_SOCKET"]
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(os.environ["XDG_RUNTIME_DIR"], "loki", "agent.sock")
+    return None
+
+
+def serve(server, conn, modules):
+    conn.settimeout(REQUEST_TIMEOUT)
+    fds = []
+    try:
+        data, fds, _, _ = socket.recv_fds(conn, 65536, 3)
+        chunks = [data]
+        size = len(data)
+        while chunk := conn.recv(65536):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > MAX_REQUEST_SIZE:
+                raise ValueError("Request too large")
+        request = json.loads(b"".join(chunks))
+
+        # Tools must run under the interpreter the caller resolved (e.g. the cwd's .venv)
+        if len(fds) != 3 or request["prefix"] != sys.prefix:
+            conn.sendall(b'{"fallback": true}\n')
+            return
+
+        conn.sendall(b'{"accepted": true}\n')
+        conn.settimeout(None)
+        with caller_context(request, fds):
+            # Loaded in the daemon so later calls fork with the module already imported.
+            # Failures are left for the child to hit again and report to the caller.
+            with contextlib.suppress(Exception):
+                load_module(request["path"], modules)
+
+            pid = os.fork()
+            if pid == 0:
+                server.close()
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                run_call(conn, request, modules)
+    except (OSError, ValueError, KeyError):
+        traceback.print_exc()
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+
+@contextlib.contextmanager
+def caller_context(request, fds):
+    """Temporarily adopt the caller's stdio, environment and working directory"""
+    saved_fds = [os.dup(fd) for fd in (0, 1, 2)]
+    saved_env = dict(os.environ)
+    saved_cwd = os.getcwd()
+    try:
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+        os.environ.clear()
+        os.environ.update(request["env"])
+        os.chdir(request["cwd"])
+        yield
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for target, fd in enumerate(saved_fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        os.chdir(saved_cwd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+
+
+def run_call(conn, request, modules):
+    """Runs in the forked child and never returns"""
+    try:
+        mod = load_module(request["path"], modules)
+        if not hasattr(mod, request["func"]):
+            raise Exception(f"No module function '{request['func']}' at '{request['path']}'")
+
+        value = getattr(mod, request["func"])(**request["data"])
+        response = {"output": render_output(value)}
+    except SystemExit as e:
+        # Relayed so the runner exits the same way it would in-process
+        code = e.code if e.code is None or isinstance(e.code, (int, str)) else str(e.code)
+        response = {"exit": code}
+    except BaseException:
+        traceback.print_exc()
+        response = {"exit": 1}
+
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        conn.sendall(json.dumps(response).encode("utf-8"))
+    finally:
+        os._exit(0)
+
+
+def render_output(value):
+    """Mirrors return_to_llm in the runner scripts"""
+    if value is None:
+        return None
+
+    if isinstance(value, (str, int, float, bool)):
+        return str(value)
+    elif isinstance(value, (dict, list)):
+        if orjson:
+            try:
+                return orjson.dumps(value, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+            except TypeError:
+                pass
+        return json.dumps(value, indent=2, ensure_ascii=False)
+    else:
+        return ""
+
+
+def load_module(path, modules):
+    mtime = os.stat(path).st_mtime_ns
+    cached = modules.get(path)
+    if cached and cached[0] == mtime:
+        modules.move_to_end(path)
+        return cached[1]
+
+    spec = importlib.util.spec_from_file_location(os.path.basename(path), path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+
+    modules[path] = (mtime, mod)
+    modules.move_to_end(path)
+    while len(modules) > MAX_CACHED_MODULES:
+        modules.popitem(last=False)
+
+    return mod
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
-import requests
+import orjson
 import sys
 import re
-import json
+from urllib.request import urlopen
 
 # Provider mapping from models.yaml to OpenRouter prefixes
 PROVIDER_MAPPING = {
@@ -26,39 +26,40 @@ PROVIDER_MAPPING = {
     "ernie": "baidu",
     "github": "github",
 }
+PROVIDER_MAPPING = {sys.intern(k): v for k, v in PROVIDER_MAPPING.items()}
+_OPENROUTER = sys.intern("openrouter")
+
+_NAME_RE = re.compile(r"^(\s*)-\s*name:\s*(.+)$")
+_PROVIDER_RE = re.compile(r"^\s*-?\s*provider:\s*(.+)$")
+_FIELD_RE = re.compile(r"^(\s*)([\w_-]+):")
 
 def fetch_openrouter_models():
     print("Fetching models from OpenRouter...")
     try:
-        response = requests.get("https://openrouter.ai/api/v1/models")
-        response.raise_for_status()
-        data = response.json()["data"]
+        with urlopen("https://openrouter.ai/api/v1/models", timeout=30) as response:
+            data = orjson.loads(response.read())["data"]
         print(f"Fetched {len(data)} models.")
         return data
     except Exception as e:
         print(f"Error fetching models: {e}")
         sys.exit(1)
 
-def get_openrouter_model(models_data, provider_prefix, model_name, is_openrouter_provider=False):
+def get_openrouter_model(models_by_id, models_by_suffix, provider_prefix, model_name, is_openrouter_provider=False):
     if is_openrouter_provider:
         # For openrouter provider, the model_name in yaml is usually the full ID
-        for model in models_data:
-            if model["id"] == model_name:
-                return model
-        return None
+        return models_by_id.get(model_name)
 
     expected_id = f"{provider_prefix}/{model_name}"
     
     # 1. Try exact match on ID
-    for model in models_data:
-        if model["id"] == expected_id:
-            return model
+    model = models_by_id.get(expected_id)
+    if model:
+        return model
             
     # 2. Try match by suffix
-    for model in models_data:
-        if model["id"].split("/")[-1] == model_name:
-            if model["id"].startswith(f"{provider_prefix}/"):
-                return model
+    for model in models_by_suffix.get(model_name, ()):
+        if model["id"].startswith(f"{provider_prefix}/"):
+            return model
 
     return None
 
@@ -74,16 +75,13 @@ def format_price(price_per_token):
     except:
         return None
 
-def get_indentation(line):
-    return len(line) - len(line.lstrip())
-
-def process_model_block(block_lines, current_provider, or_models):
+def process_model_block(block_lines, current_provider, models_by_id, models_by_suffix):
     if not block_lines:
         return []
 
     # 1. Identify model name and indentation
     name_line = block_lines[0]
-    name_match = re.match(r"^(\s*)-\s*name:\s*(.+)$", name_line)
+    name_match = _NAME_RE.match(name_line)
     if not name_match:
         return block_lines 
 
@@ -92,12 +90,12 @@ def process_model_block(block_lines, current_provider, or_models):
     
     # 2. Find OpenRouter model
     or_prefix = PROVIDER_MAPPING.get(current_provider)
-    is_openrouter_provider = (current_provider == "openrouter")
+    is_openrouter_provider = (current_provider is _OPENROUTER)
     
     if not or_prefix and not is_openrouter_provider:
         return block_lines
         
-    or_model = get_openrouter_model(or_models, or_prefix, model_name, is_openrouter_provider)
+    or_model = get_openrouter_model(models_by_id, models_by_suffix, or_prefix, model_name, is_openrouter_provider)
     if not or_model:
         return block_lines
 
@@ -140,7 +138,7 @@ def process_model_block(block_lines, current_provider, or_models):
             continue
             
         # Look for "key: value"
-        m = re.match(r"^(\s*)([\w_-]+):", line)
+        m = _FIELD_RE.match(line)
         if m:
             indent = m.group(1)
             key = m.group(2)
@@ -162,93 +160,91 @@ def process_model_block(block_lines, current_provider, or_models):
             idx = existing_fields[key]
             # Preserve original key indentation exactly
             original_line = new_block[idx]
-            m = re.match(r"^(\s*)([\w_-]+):", original_line)
+            m = _FIELD_RE.match(original_line)
             if m:
                 current_indent = m.group(1)
                 new_block[idx] = f"{current_indent}{key}: {value}\n"
     
     # Insert missing fields
     # Insert after the name line
-    insertion_idx = 1
-    
-    for key, value in updates.items():
-        if key not in existing_fields:
-            new_line = f"{field_indent_str}{key}: {value}\n"
-            new_block.insert(insertion_idx, new_line)
-            insertion_idx += 1
+    insertions = [
+        f"{field_indent_str}{key}: {value}\n"
+        for key, value in updates.items()
+        if key not in existing_fields
+    ]
+    new_block[1:1] = insertions
             
     return new_block
 
 def main():
     or_models = fetch_openrouter_models()
+
+    # Index models once so each lookup is a dict hit instead of a full scan
+    models_by_id = {}
+    models_by_suffix = {}
+    for model in or_models:
+        models_by_id.setdefault(model["id"], model)
+        models_by_suffix.setdefault(model["id"].split("/")[-1], []).append(model)
     
     print("Reading models.yaml...")
-    with open("models.yaml", "r") as f:
-        lines = f.readlines()
+    with open("models.yaml", "r", encoding="utf-8") as f:
+        lines = f.read().splitlines(keepends=True)
         
     new_lines = []
     current_provider = None
+    skip_provider = True
+    block_lines = []
+    start_indent = 0
     
-    i = 0
-    while i < len(lines):
-        line = lines[i]
+    for line in lines:
+        if block_lines:
+            stripped = line.strip()
+            
+            # Empty lines, comments and deeper-indented properties belong to the current model block
+            if not stripped or stripped.startswith("#") or len(line) - len(line.lstrip()) > start_indent:
+                block_lines.append(line)
+                continue
+            
+            # Equal or lesser indentation ends the block. Models of providers without an
+            # OpenRouter mapping are still collected, so nested keys aren't mistaken for
+            # provider lines, but are left untouched
+            if skip_provider:
+                new_lines.extend(block_lines)
+            else:
+                new_lines.extend(process_model_block(block_lines, current_provider, models_by_id, models_by_suffix))
+            block_lines = []
         
         # Check for provider
         # - provider: name
-        p_match = re.match(r"^\s*-?\s*provider:\s*(.+)$", line)
-        if p_match:
-            current_provider = p_match.group(1).strip()
-            new_lines.append(line)
-            i += 1
-            continue
-            
+        if "provider:" in line:
+            p_match = _PROVIDER_RE.match(line)
+            if p_match:
+                current_provider = sys.intern(p_match.group(1).strip())
+                skip_provider = current_provider not in PROVIDER_MAPPING and current_provider is not _OPENROUTER
+                new_lines.append(line)
+                continue
+
         # Check for model start
         # - name: ...
-        m_match = re.match(r"^(\s*)-\s*name:\s*.+$", line)
-        if m_match:
-            # Start of a model block
-            start_indent = len(m_match.group(1))
-            
-            # Collect block lines
-            block_lines = [line]
-            j = i + 1
-            while j < len(lines):
-                next_line = lines[j]
-                stripped = next_line.strip()
-                
-                # If empty or comment, include it
-                if not stripped or stripped.startswith("#"):
-                    block_lines.append(next_line)
-                    j += 1
-                    continue
-                
-                # Check indentation
-                next_indent = get_indentation(next_line)
-                
-                # If indentation is greater, it's part of the block (property)
-                if next_indent > start_indent:
-                    block_lines.append(next_line)
-                    j += 1
-                    continue
-                
-                # If indentation is equal or less, it's the end of the block
-                break
-            
-            # Process the block
-            processed_block = process_model_block(block_lines, current_provider, or_models)
-            new_lines.extend(processed_block)
-            
-            # Advance i
-            i = j
-            continue
+        if "name:" in line:
+            m_match = _NAME_RE.match(line)
+            if m_match:
+                start_indent = len(m_match.group(1))
+                block_lines = [line]
+                continue
             
         # Otherwise, just a regular line
         new_lines.append(line)
-        i += 1
+
+    if block_lines:
+        if skip_provider:
+            new_lines.extend(block_lines)
+        else:
+            new_lines.extend(process_model_block(block_lines, current_provider, models_by_id, models_by_suffix))
         
     print("Saving models.yaml...")
-    with open("models.yaml", "w") as f:
-        f.writelines(new_lines)
+    with open("models.yaml", "w", encoding="utf-8") as f:
+        f.write("".join(new_lines))
     print("Done.")
 
 if __name__ == "__main__":
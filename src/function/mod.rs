@@ -28,6 +28,7 @@ use std::{
     env, fs, io,
     path::{Path, PathBuf},
     process::{Command, Stdio},
+    sync::{LazyLock, Mutex},
 };
 use strum_macros::AsRefStr;
 use supervisor::SUPERVISOR_FUNCTION_PREFIX;
@@ -233,6 +234,7 @@ impl Functions {
             Config::functions_bin_dir().display()
         );
         Self::build_global_function_binaries(visible_tools, None)?;
+        Self::precompile_python_modules(&Self::python_tool_paths(visible_tools));
 
         Ok(declarations)
     }
@@ -278,6 +280,14 @@ impl Functions {
         };
         let declarations = [global_tools_declarations, agent_script_declarations].concat();
 
+        let mut python_modules = Self::python_tool_paths(global_tools);
+        if let Ok(path) = Config::agent_functions_file(name)
+            && path.extension().and_then(OsStr::to_str) == Some("py")
+        {
+            python_modules.push(path);
+        }
+        Self::precompile_python_modules(&python_modules);
+
         Ok(Self { declarations })
     }
 
@@ -782,6 +792,117 @@ impl Functions {
 
         Ok(())
     }
+
+    /// The runner scripts load the tool module through `importlib`, which reuses the bytecode
+    /// cached in `__pycache__`. Compiling any modules whose cache is missing or outdated up front
+    /// means the first tool call after installing or editing a tool doesn't pay for compiling it.
+    fn precompile_python_modules(module_paths: &[PathBuf]) {
+        if module_paths.is_empty() {
+            return;
+        }
+
+        // Mirror the interpreter the runner scripts re-exec into
+        let venv_python = if cfg!(windows) {
+            Path::new(".venv").join("Scripts").join("python.exe")
+        } else {
+            Path::new(".venv").join("bin").join("python")
+        };
+        let python = if venv_python.exists() {
+            venv_python
+        } else {
+            match which::which("python").or_else(|_| which::which("python3")) {
+                Ok(path) => path,
+                Err(_) => {
+                    debug!("Python executable not found in PATH; skipping precompilation");
+                    return;
+                }
+            }
+        };
+
+        // Without a known cache tag, leave the freshness check to compileall itself
+        let cache_tag = python_cache_tag(&python);
+        let stale_paths: Vec<&PathBuf> = module_paths
+            .iter()
+            .filter(|path| {
+                cache_tag
+                    .as_deref()
+                    .is_none_or(|tag| !has_fresh_bytecode(path, tag))
+            })
+            .collect();
+        if stale_paths.is_empty() {
+            return;
+        }
+
+        debug!(
+            "Precompiling Python modules {stale_paths:?} with {}",
+            python.display()
+        );
+        if let Err(e) = Command::new(&python)
+            .args(["-m", "compileall", "-q"])
+            .args(&stale_paths)
+            .stdin(Stdio::null())
+            .stdout(Stdio::null())
+            .stderr(Stdio::null())
+            .status()
+        {
+            debug!("Failed to precompile Python modules: {e}");
+        }
+    }
+
+    fn python_tool_paths(tools: &[String]) -> Vec<PathBuf> {
+        tools
+            .iter()
+            .filter(|tool| Path::new(tool).extension().and_then(OsStr::to_str) == Some("py"))
+            .map(|tool| Config::global_tools_dir().join(tool))
+            .collect()
+    }
+}
+
+static PYTHON_CACHE_TAGS: LazyLock<Mutex<HashMap<PathBuf, Option<String>>>> =
+    LazyLock::new(|| Mutex::new(HashMap::new()));
+
+/// The interpreter's `sys.implementation.cache_tag`, asked at most once per process
+fn python_cache_tag(python: &Path) -> Option<String> {
+    let mut cache_tags = PYTHON_CACHE_TAGS.lock().ok()?;
+    cache_tags
+        .entry(python.to_path_buf())
+        .or_insert_with(|| {
+            let output = Command::new(python)
+                .args([
+                    "-c",
+                    "import sys; print(sys.implementation.cache_tag or '')",
+                ])
+                .stdin(Stdio::null())
+                .stderr(Stdio::null())
+                .output()
+                .ok()
+                .filter(|output| output.status.success())?;
+            let tag = String::from_utf8(output.stdout).ok()?.trim().to_string();
+            (!tag.is_empty()).then_some(tag)
+        })
+        .clone()
+}
+
+/// Whether `__pycache__` holds bytecode for the module, compiled by the interpreter with
+/// the given cache tag, that is at least as new as its source
+fn has_fresh_bytecode(module_path: &Path, cache_tag: &str) -> bool {
+    let (Some(parent), Some(stem)) = (
+        module_path.parent(),
+        module_path.file_stem().and_then(OsStr::to_str),
+    ) else {
+        return false;
+    };
+    let Ok(source_modified) = fs::metadata(module_path).and_then(|m| m.modified()) else {
+        return false;
+    };
+
+    fs::metadata(
+        parent
+            .join("__pycache__")
+            .join(format!("{stem}.{cache_tag}.pyc")),
+    )
+    .and_then(|m| m.modified())
+    .is_ok_and(|modified| modified >= source_modified)
 }
 
 #[derive(Debug, Clone, Serialize, Deserialize)]